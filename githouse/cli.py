@@ -1,14 +1,17 @@
+import asyncio
 import click
 import collections
+import dataclasses
 import datetime as dt
-import dateutil.relativedelta as rd
-import dateutil.parser
-import github
+import functools
+import hashlib
+import inspect
 import json
 import logging
 import pathlib
 import re
-import requests
+import shelve
+import time
 
 logging.basicConfig()
 logger = logging.getLogger()
@@ -19,6 +22,7 @@ class Options:
     gh_team = None
     gh_org = None
     ch_token = None
+    no_cache = False
 
     def __str__(self):
         return str(self.__dict__)
@@ -89,6 +93,15 @@ class Options:
             callback=Options.set_thing("verbose"),
         )
 
+    @staticmethod
+    def no_cache_opt():
+        return click.option(
+            "--no-cache",
+            help="Ignore cached github and clubhouse responses (fresh ones are still cached)",
+            is_flag=True,
+            callback=Options.set_thing("no_cache"),
+        )
+
     def set_verbose(self, val, **kwds):
         self.verbose = val
         lev = "WARNING"
@@ -100,6 +113,38 @@ class Options:
         return self.verbose
 
 
+@dataclasses.dataclass
+class PRRec:
+    """
+    The handful of PR fields a report needs
+    """
+
+    __slots__ = ("author", "branch", "number", "url", "title", "repo")
+
+    author: str
+    branch: str
+    number: int
+    url: str
+    title: str
+    repo: str
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Load a PR from a saved report, including the REST PR objects older versions saved
+        """
+        if "head" in d:
+            return cls(
+                author=rget(d, "user.login"),
+                branch=rget(d, "head.ref"),
+                number=d.get("number"),
+                url=d.get("html_url"),
+                title=d.get("title"),
+                repo=rget(d, "head.repo.name", ""),
+            )
+        return cls(**d)
+
+
 pass_opts = click.make_pass_decorator(Options, ensure=True)
 
 
@@ -133,6 +178,7 @@ def users(ctx, opts, *args, **kwds):
 @Options.gh_team_opt()
 @Options.verbose_opt()
 @Options.ch_token_opt()
+@Options.no_cache_opt()
 # @click.option('-u', '--user', multiple=True, help='The user to limit by.')
 # @click.option('-p', '--project', help='An optional project to limit by')
 @click.option(
@@ -170,26 +216,27 @@ def report(ctx, opts, start_date, end_date, state, filename, outfile, *args, **k
     This will find all PRs that have been merged in the date range specified.
     Please keep in mind that a long date range (or a large # of PRs) will cause
     a large amount of network IO to and from github and clubhouse APIs. This will
-    hit github once for each 30 PRs returned for search, once to get the team members,
-    as well as once per each PR.
+    hit the github graphql API once for each 100 PRs returned for search (the branch
+    name comes back in the same payload), once to get the team members,
+    as well as clubhouse once per each unique story.
 
     So, if you have a 100PRs merged in a daterange, this script will hit the Github API
-    105 times, and the clubhouse API 100 times. (This is unfortunately necessary to get
-    the branch name for each PR, and story metadata from clubhouse.) A github access
-    token should allow for up to 5000 requests / hour, and Clubhouse allows up to
-    200 requests per minute. You _should_ be fine. I use this regularly for a team of 12
-    people, with ~100 PRs in a busy week.
+    twice, and the clubhouse API once per story (stories cached by an earlier run
+    are free). A github access token should allow for up to 5000 requests / hour,
+    and Clubhouse allows up to 200 requests per minute. You _should_ be fine. I use
+    this regularly for a team of 12 people, with ~100 PRs in a busy week.
 
     If for some reason you do get throttled, use a smaller date range (or a less
     productive team! ;) )
     """
 
     if not filename:
+        import dateutil.relativedelta as rd
+
         if not opts.ch_token:
             raise RuntimeError("A clubhouse token is required.")
 
-        gh, team = init_gh(opts)
-        members = [m.login for m in team.get_members()]
+        members = team_members(opts)
         author_query = " ".join([f"author:{m}" for m in members])
 
         today = dt.datetime.now()
@@ -206,113 +253,115 @@ def report(ctx, opts, start_date, end_date, state, filename, outfile, *args, **k
         logger.info("Github PR query: %s", q)
 
         # work around pygithub's request-happy arch + bug not supporting repeated qualifiers
-        returned_prs = [pr for pr in hit_gh(opts, "/search/issues", data={"q": q})]
+        returned_prs = [pr for pr in search_prs(opts, q)]
 
         logger.warning("Total of %s PRs returned", len(returned_prs))
 
-        last_user = ""
-        user_report = collections.defaultdict(lambda: [])
-
-        report = empty_report()
-
-        # 'user': { 'stories': {'123': { 'id':ch123, 'name': 'fix stuff', 'type':'bug', prs=[] }, ... }, 'misc_prs': [ ... ], 'total_prs':4, 'total_stories':2 }
-        for pr in sorted(returned_prs, key=lambda x: rget(x, "user.login")):
-            author = rget(pr, "user.login")
-            if author != last_user:
-                if last_user:
-                    logger.debug("Storing report for %s", last_user)
-                    report["total_stories"] = len(report["stories"])
-                    report["total_prs"] = sum(
-                        [len(v["prs"]) for k, v in report["stories"].items()]
-                    ) + len(report["misc_prs"])
-
-                    user_report[last_user] = report
-                    report = empty_report()
-                logger.debug("Processing PRs for %s", author)
-                last_user = author
-
-            pr_uri = rget(pr, "pull_request.url")
-            assert pr_uri, "Each PR should have a URL"
-
-            branch = ""
-            for pr_obj in hit_gh(opts, uri=pr_uri):
-                logger.debug(pr_obj)
-                branch = rget(pr_obj, "head.ref")
-                logger.info("PR Branch = %s", branch)
-
-            assert pr_obj, "PR object should be returned"
-            assert branch, "Each PR should have a branch"
-
-            m = story_re.search(branch)
-            if m:
-                story_id = m.group("story_id").strip("chsc-")
-                story = hit_ch(opts, api=f"stories/{story_id}")
-
-                if story_id not in report["stories"]:
-                    report["stories"][story_id].update(story)
-                report["stories"][story_id]["prs"].append(pr_obj)
-            else:
-                report["misc_prs"].append(pr_obj)
+        pr_stories = [(pr, pr_story_id(pr)) for pr in returned_prs]
+        story_ids = {story_id for _, story_id in pr_stories if story_id}
+        stories = asyncio.run(fetch_stories(opts, story_ids))
 
-        # store the last user's report
-        report["start_date"] = start_date
-        report["end_date"] = end_date
-        report["total_stories"] = len(report["stories"])
-        report["total_prs"] = sum(
-            [len(v["prs"]) for k, v in report["stories"].items()]
-        ) + len(report["misc_prs"])
-        user_report[last_user] = report
+        by_author = collections.defaultdict(list)
+        for pr, story_id in pr_stories:
+            by_author[pr.author].append((pr, story_id))
+
+        user_report = {}
+        for author, author_prs in by_author.items():
+            logger.debug("Processing PRs for %s", author)
+            user_report[author] = build_report(author_prs, stories)
 
         if outfile:
             with open(outfile, "w") as f:
-                dump = {"members": members, "report": user_report}
-                f.write(json.dumps(dump))
+                dump = {
+                    "members": members,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "report": user_report,
+                }
+                json.dump(dump, f, default=dataclasses.asdict)
             logger.warning("Full report saved to %s", outfile)
     else:
         with open(filename, "r") as f:
             report = json.load(f)
             user_report = report["report"]
             members = report["members"]
-            start_date = report["start_date"]
-            end_date = report["end_date"]
 
-    pretty_team = re.sub(r"[_-]+", " ", opts.gh_team).title()
+        # older versions only saved the dates on the last author's report
+        if "start_date" not in report:
+            report = next(r for r in user_report.values() if "start_date" in r)
+        start_date = report["start_date"]
+        end_date = report["end_date"]
+
+        for report in user_report.values():
+            report["misc_prs"] = [PRRec.from_dict(pr) for pr in report["misc_prs"]]
+            for story in report["stories"].values():
+                story["prs"] = [PRRec.from_dict(pr) for pr in story["prs"]]
 
-    click.secho(f"# {pretty_team} Updates {start_date} - {end_date}")
+    pretty_team = team_sep_re.sub(" ", opts.gh_team).title()
+
+    lines = [click.style(f"# {pretty_team} Updates {start_date} - {end_date}")]
 
     for author in sorted(members):
         report = user_report.get(author, empty_report())
         ies = "ies" if report["total_stories"] != 1 else "y"
         s = "s" if report["total_prs"] != 1 else ""
 
-        click.secho(
-            f"\n## {author} ({report['total_stories']} Stor{ies}; {report['total_prs']} PR{s})",
-            bold=True,
+        lines.append(
+            click.style(
+                f"\n## {author} ({report['total_stories']} Stor{ies}; {report['total_prs']} PR{s})",
+                bold=True,
+            )
         )
         for story_id, story in report["stories"].items():
             title = f"[{story['story_type'].capitalize()} ch{story_id}]({story['app_url']}): {story['name']}"
-            click.secho(f" * {title}", fg="green")
+            lines.append(click.style(f" * {title}", fg="green"))
 
             for pr in story["prs"]:
-                repo = rget(pr, "head.repo.name", "")
-                title = f"   * [#{repo}/{pr.get('number')}]({pr.get('html_url')}): {pr.get('title')}"
-                click.secho(f"{title}", fg="blue")
+                title = f"   * [#{pr.repo}/{pr.number}]({pr.url}): {pr.title}"
+                lines.append(click.style(f"{title}", fg="blue"))
 
         if len(report["misc_prs"]):
-            click.secho(f" * Misc PRs", fg="green")
+            lines.append(click.style(f" * Misc PRs", fg="green"))
             for pr in report["misc_prs"]:
-                repo = rget(pr, "head.repo.name", "")
-                title = f"   * [#{repo}/{pr.get('number')}]({pr.get('html_url')}): {pr.get('title')}"
-                click.secho(f"{title}", fg="blue")
+                title = f"   * [#{pr.repo}/{pr.number}]({pr.url}): {pr.title}"
+                lines.append(click.style(f"{title}", fg="blue"))
+
+    # one write for the whole report rather than one per line
+    click.echo("\n".join(lines))
 
 
-story_re = re.compile(r"(?P<story_id>\b(?:ch|sc)-?\d+\b)")
+story_re = re.compile(r"\b(?:ch|sc)-?(?P<story_id>\d+)\b")
+team_sep_re = re.compile(r"[_-]+")
 link_re = re.compile(r'<(?P<link>[^>]+)> *; *rel= *"(?P<relationship>[^"]+)"')
 
 
+def build_report(pr_stories, stories):
+    """
+    Build one author's report from their (pr, story_id) pairs
+    """
+    # { 'stories': {'123': { 'id':ch123, 'name': 'fix stuff', 'type':'bug', prs=[] }, ... }, 'misc_prs': [ ... ], 'total_prs':4, 'total_stories':2 }
+    report = empty_report()
+    seen = set()
+
+    for pr, story_id in pr_stories:
+        if story_id:
+            if story_id not in seen:
+                seen.add(story_id)
+                report["stories"][story_id] = {**stories[story_id], "prs": []}
+            report["stories"][story_id]["prs"].append(pr)
+        else:
+            report["misc_prs"].append(pr)
+
+    report["total_stories"] = len(report["stories"])
+    report["total_prs"] = sum(len(v["prs"]) for v in report["stories"].values()) + len(
+        report["misc_prs"]
+    )
+    return report
+
+
 def empty_report():
     return {
-        "stories": collections.defaultdict(lambda: {"prs": []}),
+        "stories": {},
         "misc_prs": [],
         "total_prs": 0,
         "total_stories": 0,
@@ -320,20 +369,150 @@ def empty_report():
 
 
 def rget(d, path, default=None):
-    if isinstance(path, (str)):
-        paths = path.split(".")
-    else:
-        paths = path
-    subd = d.get(paths[0], {})
-    if not subd:
-        return default
-    elif len(paths) == 1:
-        return subd
-    else:
-        return rget(subd, paths[1:], default)
+    parts = path.split(".") if isinstance(path, str) else path
+    cur = d
+    for part in parts:
+        if not isinstance(cur, dict):
+            return default
+        cur = cur.get(part)
+        if cur is None:
+            return default
+    return cur
+
+
+def pr_story_id(pr):
+    """
+    Return the clubhouse story id in the PR's branch name, or None
+    """
+    branch = pr.branch
+    logger.info("PR Branch = %s", branch)
+    assert branch, "Each PR should have a branch"
+
+    m = story_re.search(branch)
+    if m:
+        return m.group("story_id")
+    return None
+
+
+_story_cache = {}
+
+
+async def fetch_stories(opts, story_ids):
+    """
+    Concurrently fetch each unique story from clubhouse.
+
+    Stories already fetched during this run are not fetched again, and
+    hit_ch_async serves stories cached on disk by earlier runs.
+    Returns a dict of story_id -> story.
+    """
+    missing = [story_id for story_id in story_ids if story_id not in _story_cache]
 
+    import httpx
 
-def hit_ch(opts, api=None, uri=None, data={}, method="GET"):
+    sem = asyncio.Semaphore(10)
+    transport = _transport(is_async=True)
+    async with httpx.AsyncClient(transport=transport, timeout=30) as client:
+        fetched = await asyncio.gather(
+            *[fetch_story(opts, story_id, client, sem) for story_id in missing]
+        )
+    _story_cache.update(zip(missing, fetched))
+
+    return {story_id: _story_cache[story_id] for story_id in story_ids}
+
+
+async def fetch_story(opts, story_id, client, sem):
+    async with sem:
+        return await hit_ch_async(opts, client, api=f"stories/{story_id}")
+
+
+def cache_path():
+    path = pathlib.Path(click.get_app_dir("githouse"))
+    path.mkdir(parents=True, exist_ok=True)
+    return str(path / "cache.db")
+
+
+def cache_key(token, method, api, uri, data):
+    """
+    Key a response on the call and a fingerprint of the token that made it, so
+    different workspaces or github accounts never see each other's responses
+    """
+    fingerprint = hashlib.sha256((token or "").encode()).hexdigest()[:16]
+    return repr((fingerprint, method, api, uri, sorted((data or {}).items())))
+
+
+def cache_get(opts, key):
+    """
+    Return a (hit, response) tuple for key from the on-disk cache
+    """
+    if opts.no_cache:
+        return False, None
+
+    with shelve.open(cache_path()) as db:
+        expires, res = db.get(key, (0, None))
+    if expires > time.time():
+        logger.info("Cache hit for %s", key)
+        return True, res
+    return False, None
+
+
+def cache_set(key, res, ttl):
+    with shelve.open(cache_path()) as db:
+        db[key] = (time.time() + ttl, res)
+
+
+def cached(ttl, token):
+    """
+    Cache an async hit_* function's json response on disk for ttl seconds.
+
+    Responses are keyed on the opts attribute named by token, and the method,
+    api/uri and params of the call. Only GETs are cached, and a ttl of 0
+    disables caching. --no-cache skips cache reads.
+    """
+
+    def decorator(fn):
+        sig = inspect.signature(fn)
+
+        def lookup(args, kwds):
+            call = sig.bind(*args, **kwds)
+            call.apply_defaults()
+            params = call.arguments
+            method = params.get("method", "GET")
+            if not ttl or method != "GET":
+                return None, None, None
+
+            key = cache_key(
+                getattr(params["opts"], token),
+                method,
+                params.get("api"),
+                params.get("uri"),
+                params.get("data"),
+            )
+            return (key,) + cache_get(params["opts"], key)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwds):
+            key, hit, res = lookup(args, kwds)
+            if hit:
+                return res
+            res = await fn(*args, **kwds)
+            if key:
+                cache_set(key, res, ttl)
+            return res
+
+        return wrapper
+
+    return decorator
+
+
+# stories for merged PRs rarely change, so hang on to them for a month
+story_ttl = 30 * 24 * 60 * 60
+
+
+@cached(ttl=story_ttl, token="ch_token")
+async def hit_ch_async(opts, client, api=None, uri=None, data={}):
+    """
+    async GET against the clubhouse api using a shared httpx client
+    """
     assert api or uri, "Either an api or a URI should be passed"
 
     if api:
@@ -343,20 +522,8 @@ def hit_ch(opts, api=None, uri=None, data={}, method="GET"):
 
     logger.info("Hitting clubhouse %s", uri)
 
-    # TODO: this is ugly
-    if method == "GET":
-        params = data
-        data = None
-    if method == "POST":
-        params = None
-        data = data
-
-    resp = requests.request(
-        method,
-        uri,
-        params=params,
-        data=data,
-        headers={"Clubhouse-Token": opts.ch_token},
+    resp = await client.get(
+        uri, params=data, headers={"Clubhouse-Token": opts.ch_token}
     )
     logger.info("Clubhouse response: %s", resp)
     resp.raise_for_status()
@@ -364,12 +531,80 @@ def hit_ch(opts, api=None, uri=None, data={}, method="GET"):
     return resp.json()
 
 
+retry_statuses = {429, 502, 503, 504}
+
+
+def retry_delay(request, resp, attempt):
+    """
+    Seconds to wait before retrying a throttled or failed GET, or None to not retry
+    """
+    if request.method != "GET" or resp.status_code not in retry_statuses:
+        return None
+
+    retry_after = resp.headers.get("Retry-After", "")
+    delay = int(retry_after) if retry_after.isdigit() else 0.3 * 2 ** attempt
+    logger.info("Retrying %s after %s in %ss", request.url, resp.status_code, delay)
+    return delay
+
+
+def _transport(is_async=False):
+    """
+    An http/2 transport that retries GETs that get throttled or hit a flaky gateway
+    """
+    import httpx
+
+    kwds = dict(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    )
+
+    if is_async:
+
+        class AsyncRetryTransport(httpx.AsyncHTTPTransport):
+            async def handle_async_request(self, request):
+                for attempt in range(3):
+                    resp = await super().handle_async_request(request)
+                    delay = retry_delay(request, resp, attempt)
+                    if delay is None:
+                        return resp
+                    await resp.aclose()
+                    await asyncio.sleep(delay)
+                return await super().handle_async_request(request)
+
+        return AsyncRetryTransport(**kwds)
+
+    class RetryTransport(httpx.HTTPTransport):
+        def handle_request(self, request):
+            for attempt in range(3):
+                resp = super().handle_request(request)
+                delay = retry_delay(request, resp, attempt)
+                if delay is None:
+                    return resp
+                resp.close()
+                time.sleep(delay)
+            return super().handle_request(request)
+
+    return RetryTransport(**kwds)
+
+
+@functools.lru_cache(maxsize=None)
+def _client():
+    """
+    A keep-alive http/2 client for github, multiplexing requests over one connection
+    """
+    import httpx
+
+    return httpx.Client(transport=_transport(), follow_redirects=True, timeout=30)
+
+
 def hit_gh(opts, api=None, uri=None, data={}, method="GET"):
     """
     hack around pygithub's request-happy architecture
 
     NOTE: this will return an iterator even if there's only
-    one json object response.
+    one json object response. Both search results and plain
+    json arrays are paginated through.
     """
     assert api or uri, "Either an api or a uri should be passed"
 
@@ -378,56 +613,170 @@ def hit_gh(opts, api=None, uri=None, data={}, method="GET"):
     if not uri:
         uri = f"https://api.github.com/{api}"
 
-    logger.info("Hitting github %s", uri)
-
     # TODO: this is ugly
     if method == "GET":
-        params = data
+        params = {"per_page": 100, **data}
         data = None
     if method == "POST":
         params = None
         data = data
 
-    resp = requests.request(
-        method,
-        uri,
-        params=params,
-        data=data,
-        headers={"Authorization": f"Token {opts.gh_token}"},
-    )
-    logger.info("Github response: %s", resp)
-    resp.raise_for_status()
-
-    res = resp.json()
+    client = _client()
+    client.headers["Authorization"] = f"Token {opts.gh_token}"
+
+    while uri:
+        logger.info("Hitting github %s", uri)
+
+        # conditional GETs that come back 304 don't count against the rate limit
+        etag_key = None
+        cached_page = None
+        headers = {}
+        if method == "GET":
+            etag_key = cache_key(opts.gh_token, "ETAG", None, uri, params)
+            if not opts.no_cache:
+                with shelve.open(cache_path()) as db:
+                    cached_page = db.get(etag_key)
+            if cached_page:
+                headers["If-None-Match"] = cached_page["etag"]
+
+        resp = client.request(method, uri, params=params, data=data, headers=headers)
+        logger.info("Github response: %s", resp)
+
+        if resp.status_code == 304 and cached_page:
+            logger.info("Github %s not modified, using cached response", uri)
+            res = cached_page["body"]
+            link_header = cached_page["link"]
+        else:
+            resp.raise_for_status()
+            res = resp.json()
+            link_header = resp.headers.get("Link", "")
+            if etag_key and resp.headers.get("ETag"):
+                with shelve.open(cache_path()) as db:
+                    db[etag_key] = {
+                        "etag": resp.headers["ETag"],
+                        "body": res,
+                        "link": link_header,
+                    }
+
+        if isinstance(res, dict) and not res.get("items", []):
+            yield res
+            return
 
-    if res.get("items", []):
         links = {}
-        logger.info("Links %s", resp.headers.get("Link"))
+        logger.info("Links %s", link_header)
 
-        for uri, rel in link_re.findall(resp.headers.get("Link", "")):
-            logger.debug("Links %s -> %s", rel, uri)
-            links[rel] = uri
+        for link, rel in link_re.findall(link_header):
+            logger.debug("Links %s -> %s", rel, link)
+            links[rel] = link
 
-        items = resp.json().get("items", [])
-        logger.info("Got %s PRs", len(items))
+        items = res if isinstance(res, list) else res["items"]
+        logger.info("Got %s items", len(items))
 
         for item in items:
             # logger.debug("Yielding %s", item)
             yield item
 
-        if method == "GET" and links.get("next"):
-            for item in hit_gh(
-                opts, api, uri=links.get("next"), data=data, method=method
-            ):
-                yield item
-    else:
-        yield res
+        # the next link already carries the original query params
+        uri = links.get("next") if method == "GET" else None
+        params = None
 
 
-def init_gh(opts):
+pr_search_query = """
+query($q: String!, $cursor: String) {
+  search(query: $q, type: ISSUE, first: 100, after: $cursor) {
+    pageInfo {
+      endCursor
+      hasNextPage
+    }
+    nodes {
+      ... on PullRequest {
+        number
+        title
+        url
+        headRefName
+        author {
+          login
+        }
+        repository {
+          name
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def search_prs(opts, q):
     """
-    Return a tuple of a github client, and a Team object
+    Yield every PR matching the search query q, 100 at a time via graphql.
+
+    Each PR is yielded as a PRRec.
+    """
+    cursor = None
+    while True:
+        res = gh_graphql(opts, pr_search_query, {"q": q, "cursor": cursor})
+        search = res["search"]
+        logger.info("Got %s PRs", len(search["nodes"]))
+
+        for node in search["nodes"]:
+            # non-PR hits match no fragment and come back empty
+            if not node:
+                continue
+            yield PRRec(
+                # deleted users come back as a null author; REST calls them ghost
+                author=rget(node, "author.login", "ghost"),
+                branch=node["headRefName"],
+                number=node["number"],
+                url=node["url"],
+                title=node["title"],
+                repo=rget(node, "repository.name", ""),
+            )
+
+        if not search["pageInfo"]["hasNextPage"]:
+            break
+        cursor = search["pageInfo"]["endCursor"]
+
+
+def gh_graphql(opts, query, variables):
+    """
+    POST a query to github's graphql api, returning the response data
+    """
+    uri = "https://api.github.com/graphql"
+    logger.info("Hitting github %s", uri)
+
+    resp = _client().post(
+        uri,
+        json={"query": query, "variables": variables},
+        headers={"Authorization": f"bearer {opts.gh_token}"},
+    )
+    logger.info("Github response: %s", resp)
+    resp.raise_for_status()
+
+    res = resp.json()
+    if res.get("errors"):
+        raise RuntimeError(f"Github graphql query failed: {res['errors']}")
+
+    return res["data"]
+
+
+def team_members(opts):
+    """
+    Return the logins of everyone in the github team.
+
+    Hits the team members api directly rather than looking up the org and then
+    the team through pygithub, saving two round trips. The response is
+    revalidated with its ETag, so reruns don't spend any rate limit.
     """
+    check_gh_opts(opts)
+    logger.info("Getting team members...")
+    return [
+        m["login"]
+        for m in hit_gh(opts, f"orgs/{opts.gh_org}/teams/{opts.gh_team}/members")
+    ]
+
+
+def check_gh_opts(opts):
     if not opts.gh_token:
         raise RuntimeError(
             "A github token is required. Use --gh-token option or GH_TOKEN env var"
@@ -441,6 +790,15 @@ def init_gh(opts):
             "A github org is required. Use the --gh-org option or GH_ORG env var"
         )
 
+
+def init_gh(opts):
+    """
+    Return a tuple of a github client, and a Team object
+    """
+    check_gh_opts(opts)
+
+    import github
+
     logger.info(f"Initing GitHub w/ {opts}")
     gh = github.Github(opts.gh_token)
     logger.info("Getting team...")